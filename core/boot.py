@@ -0,0 +1,38 @@
+"""
+Прогрев процесса до первого запроса: URL-резолвер и шаблоны.
+С gunicorn --preload это делается один раз в мастере, и воркеры
+получают готовое состояние после fork (copy-on-write).
+"""
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.template import engines
+from django.urls import get_resolver
+
+
+def warm_urls():
+    resolver = get_resolver()
+    # Строим таблицы reverse() заранее, а не на первом запросе
+    resolver.reverse_dict
+    for pattern in resolver.url_patterns:
+        getattr(pattern, 'url_patterns', None)
+
+
+def warm_templates():
+    """Компилирует шаблоны проекта (админку не трогаем) в кэш загрузчика"""
+    base = Path(settings.BASE_DIR).resolve()
+    for engine in engines.all():
+        for directory in engine.template_dirs:
+            directory = Path(directory).resolve()
+            if not directory.is_relative_to(base):
+                continue
+            for path in directory.rglob('*.html'):
+                engine.get_template(path.relative_to(directory).as_posix())
+
+
+def warm_up():
+    warm_urls()
+    warm_templates()
+    # Соединения с БД не должны переживать fork — каждый воркер откроет свои
+    connections.close_all()
@@ -41,11 +41,15 @@ INSTALLED_APPS = [
     # 3. Твои приложения
     "edits",
     "theme",
-    "tailwind",
-    "django_browser_reload",
     "cloudinary",
 ]
 
+# Сборка tailwind и автоперезагрузка нужны только при разработке, а грузятся
+# в каждом воркере. Включаются явно (DJANGO_DEV_TOOLS=1 в .env), DEBUG не трогаем
+DEV_TOOLS = os.environ.get("DJANGO_DEV_TOOLS") == "1"
+if DEV_TOOLS:
+    INSTALLED_APPS += ["tailwind", "django_browser_reload"]
+
 
 
 # ======================
@@ -111,6 +115,48 @@ CLOUDINARY_STORAGE = {
 DEFAULT_FILE_STORAGE = "cloudinary_storage.storage.MediaCloudinaryStorage"
 
 
+# ======================
+# CACHE (счётчики лимитов, состояние лайков)
+# ======================
+# Без общего кэша каждый воркер gunicorn считает лимиты сам по себе
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+else:
+    CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+
+
+# ======================
+# RATE LIMITS
+# ======================
+# Формат "количество/период" (s, m, h, d), отдельно на пользователя и на IP
+RATELIMITS = {
+    "like": {"user": "30/m", "ip": "120/m"},
+    "follow": {"user": "20/m", "ip": "60/m"},
+    "view": {"user": "120/m", "ip": "600/m"},
+}
+# Сколько доверенных прокси стоит перед gunicorn. На Render/Heroku это один
+# роутер: REMOTE_ADDR — его адрес, а реальный IP он дописывает в конец
+# X-Forwarded-For. 0 — брать REMOTE_ADDR (запуск без прокси)
+RATELIMIT_PROXY_HOPS = int(os.environ.get("RATELIMIT_PROXY_HOPS", "1"))
+# Сколько секунд помнить последнее состояние лайка (user, edit)
+LIKE_STATE_TTL = 10
+
+
+# ======================
+# ENGAGEMENT LOG
+# ======================
+# События копятся в памяти воркера и пишутся пачкой (edits/events.py)
+ENGAGEMENT_BATCH_SIZE = 200
+ENGAGEMENT_FLUSH_SECONDS = 30
+
+
 # ======================
 # PASSWORD VALIDATION
 # ======================
@@ -26,6 +26,7 @@ urlpatterns = [
     path('toggle-like/<int:edit_id>/', views.toggle_like, name='toggle_like'),
     path('toggle-follow/<str:username>/', views.toggle_follow, name='toggle_follow'),
     path('increment-views/<int:edit_id>/', views.increment_views, name='increment_views'),
+    path('suggestions/', views.follow_suggestions, name='follow_suggestions'),
 
     # Авторизация
     path('register/', views.register_view, name='register'),
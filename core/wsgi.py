@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+# Прогрев до первого запроса; с preload_app (gunicorn.conf.py) — один раз до fork
+if os.environ.get('DJANGO_WARMUP', '1') == '1':
+    from core.boot import warm_up
+    warm_up()
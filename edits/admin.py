@@ -1,13 +1,30 @@
 from django.contrib import admin
-from .models import Edit, Category
+from .models import Edit, Category, AdminJob
+from .admin_large import LargeTableAdminMixin
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('name',)}
+    search_fields = ('name',)
 
 @admin.register(Edit)
-class EditAdmin(admin.ModelAdmin):
+class EditAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('title', 'author', 'category', 'views_count', 'created_at')
-    list_filter = ('category', 'created_at')
-    search_fields = ('title', 'description', 'author__username')
-    readonly_fields = ('views_count',)
\ No newline at end of file
+    list_select_related = ('author', 'category')
+    list_filter = ('category',)
+    date_hierarchy = 'created_at'
+    # Без JOIN + LIKE по всей таблице: заголовок по префиксу, автор по точному нику
+    search_fields = ('^title', '=author__username')
+    autocomplete_fields = ('author', 'category')
+    readonly_fields = ('views_count',)
+    actions = ('delete_in_background',)
+
+    @admin.action(description='Удалить выбранные эдиты (в фоне)', permissions=['delete'])
+    def delete_in_background(self, request, queryset):
+        self.enqueue_job(request, 'delete_edits', queryset)
+
+@admin.register(AdminJob)
+class AdminJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'action', 'status', 'created_by', 'created_at', 'finished_at')
+    list_filter = ('status', 'action')
+    readonly_fields = ('action', 'object_ids', 'filters', 'max_pk', 'status', 'error', 'created_by', 'created_at', 'finished_at')
@@ -0,0 +1,128 @@
+"""
+Режим админки для больших таблиц: без точных COUNT(*), без OFFSET-пагинации
+и без массовых действий внутри запроса.
+"""
+from django.contrib import messages
+from django.contrib.admin.views.main import ALL_VAR, PAGE_VAR, ChangeList
+from django.core.paginator import Paginator
+from django.db import connections
+from django.test import RequestFactory
+from django.utils.functional import cached_property
+
+from .models import AdminJob
+
+CURSOR_VAR = 'cursor'
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Для нефильтрованной таблицы берём оценку из статистики Postgres,
+    иначе считаем не дальше count_cap строк.
+    """
+    count_cap = 10000
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        connection = connections[qs.db]
+        if connection.vendor == 'postgresql' and not qs.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                    [qs.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row and row[0] > self.count_cap:
+                return row[0]
+        return qs[:self.count_cap].count()
+
+
+class CursorChangeList(ChangeList):
+    """
+    Пагинация по ключу (pk < cursor) вместо OFFSET — любая страница стоит как первая.
+    self.queryset остаётся без курсора: по нему считаются итог и «выбрать все».
+    """
+
+    def get_queryset(self, request, exclude_parameters=None):
+        value = getattr(request, 'admin_cursor', None)
+        self.cursor = int(value) if value and value.isdigit() else None
+        return super().get_queryset(request, exclude_parameters).order_by('-pk')
+
+    def get_results(self, request):
+        self.paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+        self.result_count = self.paginator.count
+        self.full_result_count = None
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.can_show_all = False
+        self.multi_page = self.result_count > self.list_per_page
+
+        page = self.queryset.filter(pk__lt=self.cursor) if self.cursor else self.queryset
+        self.result_list = list(page[:self.list_per_page])
+        self.next_cursor = self.result_list[-1].pk if len(self.result_list) >= self.list_per_page else None
+
+    def next_page_url(self):
+        return self.get_query_string({CURSOR_VAR: self.next_cursor}, [PAGE_VAR])
+
+    def first_page_url(self):
+        return self.get_query_string(remove=[PAGE_VAR])
+
+
+class LargeTableAdminMixin:
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    sortable_by = ()
+
+    def get_changelist(self, request, **kwargs):
+        return CursorChangeList
+
+    def changelist_view(self, request, extra_context=None):
+        # ChangeList считает все GET-параметры фильтрами, поэтому курсор забираем заранее.
+        # Номер страницы и «показать все» означали бы OFFSET / всю таблицу — выбрасываем
+        request.GET = request.GET.copy()
+        request.admin_cursor = request.GET.pop(CURSOR_VAR, [None])[-1]
+        request.GET.pop(PAGE_VAR, None)
+        request.GET.pop(ALL_VAR, None)
+        return super().changelist_view(request, extra_context)
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        # Стандартное удаление грузит все объекты на страницу подтверждения
+        actions.pop('delete_selected', None)
+        return actions
+
+    def enqueue_job(self, request, action, queryset):
+        """
+        Отмеченные строки (их не больше страницы) сохраняем списком id,
+        а «выбрать все» — фильтрами списка: строки найдёт run_admin_jobs.
+        """
+        if request.POST.get('select_across') == '1':
+            max_pk = queryset.order_by('-pk').values_list('pk', flat=True).first()
+            if max_pk is None:
+                return
+            job = AdminJob.objects.create(
+                action=action, filters=dict(request.GET.lists()), max_pk=max_pk, created_by=request.user,
+            )
+            self.message_user(request, f'Задача #{job.pk} поставлена в очередь (все объекты по фильтру)', messages.INFO)
+            return
+
+        ids = list(queryset.values_list('pk', flat=True))
+        job = AdminJob.objects.create(action=action, object_ids=ids, created_by=request.user)
+        self.message_user(
+            request,
+            f'Задача #{job.pk} поставлена в очередь ({len(ids)} объектов)',
+            messages.INFO,
+        )
+
+
+def job_queryset(model_admin, job):
+    """Строки задачи: сохранённые id или фильтры списка, без строк новее постановки задачи"""
+    if job.filters is None:
+        return model_admin.model._default_manager.filter(pk__in=job.object_ids)
+    if job.created_by is None:
+        raise ValueError('Автор задачи удалён — фильтры списка не применить')
+    # Фильтры разбирает та же ChangeList, что и в админке, с правами автора задачи
+    request = RequestFactory().get('/', job.filters)
+    request.user = job.created_by
+    changelist = model_admin.get_changelist_instance(request)
+    return changelist.get_queryset(request).filter(pk__lte=job.max_pk)
@@ -0,0 +1,88 @@
+"""Аналитика автора. Читает только EngagementRollup, сырой лог не трогает."""
+from datetime import timedelta
+
+from django.db.models import Sum
+from django.utils import timezone
+
+from .hll import HyperLogLog
+from .models import Edit, EngagementRollup
+
+
+def daily_stats(author_id, days=14):
+    """Просмотры / лайки / подписки по дням за последние days дней (пустые дни — нули)"""
+    today = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    since = today - timedelta(days=days - 1)
+    rows = {
+        r['bucket_start']: r
+        for r in EngagementRollup.objects.filter(
+            granularity=EngagementRollup.DAY, author_id=author_id,
+            edit_id=0, bucket_start__gte=since,
+        ).values('bucket_start', 'views', 'likes', 'follows')
+    }
+
+    stats = []
+    for i in range(days):
+        day = since + timedelta(days=i)
+        row = rows.get(day, {})
+        stats.append({
+            'day': day,
+            'views': row.get('views', 0),
+            'likes': row.get('likes', 0),
+            'follows': row.get('follows', 0),
+        })
+
+    # Высота столбика в процентах от лучшего дня
+    peak = max((s['views'] for s in stats), default=0) or 1
+    for s in stats:
+        s['height'] = round(s['views'] * 100 / peak)
+    return stats
+
+
+def unique_viewers(rollups):
+    """Уникальные зрители за окно: сливаем дневные скетчи"""
+    sketch = HyperLogLog()
+    for data in rollups.exclude(viewers=None).values_list('viewers', flat=True):
+        sketch.merge(HyperLogLog.from_bytes(data))
+    return sketch.count()
+
+
+def top_edits(author_id, days=7, limit=5):
+    """Самые просматриваемые эдиты автора за последние days дней"""
+    since = timezone.now() - timedelta(days=days)
+    rows = list(
+        EngagementRollup.objects.filter(
+            granularity=EngagementRollup.DAY, author_id=author_id,
+            edit_id__gt=0, bucket_start__gte=since,
+        )
+        .values('edit_id')
+        .annotate(views=Sum('views'), likes=Sum('likes'))
+        .order_by('-views')[:limit]
+    )
+    titles = Edit.objects.in_bulk([r['edit_id'] for r in rows])
+    return [
+        {
+            **r,
+            'edit': titles[r['edit_id']],
+            'viewers': unique_viewers(EngagementRollup.objects.filter(
+                granularity=EngagementRollup.DAY, author_id=author_id,
+                edit_id=r['edit_id'], bucket_start__gte=since,
+            )),
+        }
+        for r in rows if r['edit_id'] in titles
+    ]
+
+
+def author_summary(author_id, days=14):
+    stats = daily_stats(author_id, days)
+    since = stats[0]['day']
+    return {
+        'daily': stats,
+        'views': sum(s['views'] for s in stats),
+        'viewers': unique_viewers(EngagementRollup.objects.filter(
+            granularity=EngagementRollup.DAY, author_id=author_id,
+            edit_id=0, bucket_start__gte=since,
+        )),
+        'likes': sum(s['likes'] for s in stats),
+        'follows': sum(s['follows'] for s in stats),
+        'top_edits': top_edits(author_id),
+    }
@@ -0,0 +1,77 @@
+"""
+Буфер событий вовлечённости: копим в памяти воркера и пишем одним bulk_create,
+а не INSERT на каждый просмотр. Фоновый поток сбрасывает буфер раз в
+ENGAGEMENT_FLUSH_SECONDS, даже если новых событий нет.
+"""
+import atexit
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .models import EngagementEvent
+
+_buffer = []
+_lock = threading.Lock()
+_last_flush = time.monotonic()
+_flusher_pid = None
+
+
+def flush_seconds():
+    return getattr(settings, 'ENGAGEMENT_FLUSH_SECONDS', 30)
+
+
+def record(kind, author_id, edit_id=None, actor_id=None):
+    global _last_flush
+    event = EngagementEvent(
+        kind=kind, author_id=author_id, edit_id=edit_id,
+        actor_id=actor_id, created_at=timezone.now(),
+    )
+    start_flusher()
+    with _lock:
+        _buffer.append(event)
+        due = (
+            len(_buffer) >= getattr(settings, 'ENGAGEMENT_BATCH_SIZE', 200)
+            or time.monotonic() - _last_flush >= flush_seconds()
+        )
+    if due:
+        flush()
+
+
+def start_flusher():
+    """Поток-таймер на процесс: после fork (gunicorn --preload) потоки родителя не наследуются"""
+    global _flusher_pid
+    with _lock:
+        if _flusher_pid == os.getpid():
+            return
+        _flusher_pid = os.getpid()
+    threading.Thread(target=_flush_loop, name='engagement-flush', daemon=True).start()
+
+
+def _flush_loop():
+    while True:
+        time.sleep(flush_seconds())
+        if _buffer:
+            flush()
+            # У потока своё соединение с БД, между сбросами его не держим
+            connection.close()
+
+
+def flush():
+    global _buffer, _last_flush
+    with _lock:
+        batch, _buffer = _buffer, []
+        _last_flush = time.monotonic()
+    if batch:
+        try:
+            EngagementEvent.objects.bulk_create(batch, batch_size=500)
+        except Exception as e:
+            # Аналитика не должна ронять запрос пользователя
+            print(f"Ошибка записи событий: {e}")
+
+
+# Дописываем остаток буфера при остановке воркера
+atexit.register(flush)
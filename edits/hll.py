@@ -0,0 +1,59 @@
+"""
+HyperLogLog — приблизительный подсчёт уникальных зрителей.
+2^10 регистров, погрешность ~3%. Скетчи сливаются поэлементным max,
+поэтому дни/воркеры складываются без пересчёта по сырым данным.
+"""
+import hashlib
+import math
+
+P = 10
+M = 1 << P
+ALPHA = 0.7213 / (1 + 1.079 / M)
+
+# Первый байт сериализации: плотный массив регистров или разреженные пары (индекс, ранг)
+DENSE, SPARSE = 0, 1
+
+
+class HyperLogLog:
+    def __init__(self, registers=None):
+        self.registers = bytearray(registers) if registers else bytearray(M)
+
+    def add(self, value):
+        x = int.from_bytes(hashlib.blake2b(str(value).encode(), digest_size=8).digest(), 'big')
+        index = x >> (64 - P)
+        rest = x & ((1 << (64 - P)) - 1)
+        rank = (64 - P) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self):
+        estimate = ALPHA * M * M / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * M and zeros:
+            # Малые множества: линейный подсчёт точнее
+            estimate = M * math.log(M / zeros)
+        return round(estimate)
+
+    def to_bytes(self):
+        filled = [(i, r) for i, r in enumerate(self.registers) if r]
+        # Пока зрителей мало, пара (10 бит индекса + 6 бит ранга) занимает 2 байта
+        if len(filled) * 2 < M:
+            return bytes([SPARSE]) + b''.join(((i << 6) | r).to_bytes(2, 'big') for i, r in filled)
+        return bytes([DENSE]) + bytes(self.registers)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if not data:
+            return cls()
+        data = bytes(data)
+        if data[0] == DENSE:
+            return cls(data[1:])
+        sketch = cls()
+        for pos in range(1, len(data), 2):
+            packed = int.from_bytes(data[pos:pos + 2], 'big')
+            sketch.registers[packed >> 6] = packed & 0x3F
+        return sketch
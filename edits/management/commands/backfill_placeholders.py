@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from edits.models import Edit
+from edits.placeholders import compute_placeholder
+
+
+class Command(BaseCommand):
+    help = 'Считает заглушки (placeholder, цвет, размеры) для эдитов, у которых их ещё нет'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        done = failed = 0
+        last_id = 0
+        while True:
+            batch = list(
+                Edit.objects.filter(id__gt=last_id, placeholder='')
+                .exclude(thumbnail='').exclude(thumbnail=None)
+                .order_by('id').only('id', 'thumbnail')[:options['batch_size']]
+            )
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            for edit in batch:
+                try:
+                    with edit.thumbnail.open('rb') as f:
+                        fields = compute_placeholder(f)
+                except Exception as e:
+                    self.stderr.write(f'Эдит #{edit.id}: {e}')
+                    failed += 1
+                    continue
+                Edit.objects.filter(pk=edit.pk).update(**fields)
+                done += 1
+        self.stdout.write(f'Заглушки готовы: {done}, ошибок: {failed}')
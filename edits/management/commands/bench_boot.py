@@ -0,0 +1,64 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Модули, которые не должны грузиться при старте воркера
+LAZY_MODULES = ('imageio_ffmpeg', 'tailwind', 'django_browser_reload')
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import core.wsgi
+print(json.dumps({
+    'ms': (time.perf_counter() - start) * 1000,
+    'loaded': [m for m in %r if m in sys.modules],
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = 'Замеряет время импорта core.wsgi в чистом процессе (холодный старт воркера)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument('--max-ms', type=float, help='Упасть, если медиана выше порога')
+        parser.add_argument('--top', type=int, default=0, help='Показать N самых медленных импортов (-X importtime)')
+
+    def run_probe(self, *flags):
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'core.settings'),
+            # Меряем продакшен-конфигурацию, без инструментов разработки
+            'DJANGO_DEV_TOOLS': '0',
+        }
+        return subprocess.run(
+            [sys.executable, *flags, '-c', PROBE % (LAZY_MODULES,)],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+        )
+
+    def handle(self, *args, **options):
+        results = [json.loads(self.run_probe().stdout.strip().splitlines()[-1]) for _ in range(options['runs'])]
+        timings = sorted(r['ms'] for r in results)
+        median = statistics.median(timings)
+        self.stdout.write(f'import core.wsgi: медиана {median:.0f} мс (мин {timings[0]:.0f}, макс {timings[-1]:.0f})')
+
+        if options['top']:
+            rows = []
+            for line in self.run_probe('-X', 'importtime').stderr.splitlines():
+                if not line.startswith('import time:') or 'cumulative' in line:
+                    continue
+                _, cumulative_us, name = line[len('import time:'):].split('|')
+                rows.append((int(cumulative_us), name.strip()))
+            for cumulative_us, name in sorted(rows, reverse=True)[:options['top']]:
+                self.stdout.write(f'{cumulative_us / 1000:8.1f} мс  {name}')
+
+        loaded = results[0]['loaded']
+        if loaded:
+            raise CommandError(f'При старте загружены тяжёлые модули: {", ".join(loaded)}')
+        if options['max_ms'] and median > options['max_ms']:
+            raise CommandError(f'Холодный старт {median:.0f} мс дольше порога {options["max_ms"]:.0f} мс')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from edits.suggestions import compute_all
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает «на кого подписаться» по графу подписок и лайкам'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Сколько пользователей записывать за транзакцию')
+
+    def handle(self, *args, **options):
+        total = compute_all(options['batch_size'])
+        self.stdout.write(f'Сохранено подсказок: {total}')
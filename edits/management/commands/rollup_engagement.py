@@ -0,0 +1,182 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+
+from edits.hll import HyperLogLog
+from edits.models import Edit, EngagementEvent, EngagementRollup, RollupWatermark, ViewerSketch
+
+# Как событие меняет счётчики агрегата
+DELTAS = {
+    EngagementEvent.VIEW: ('views', 1),
+    EngagementEvent.LIKE: ('likes', 1),
+    EngagementEvent.UNLIKE: ('likes', -1),
+    EngagementEvent.FOLLOW: ('follows', 1),
+    EngagementEvent.UNFOLLOW: ('follows', -1),
+}
+
+
+class Command(BaseCommand):
+    help = 'Сворачивает лог событий в часовые и дневные агрегаты, чистит старые события'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--window-minutes', type=int, default=60, help='Сколько минут лога сворачивать за транзакцию')
+        parser.add_argument('--lag-seconds', type=int,
+                            help='Не трогать события моложе N секунд: они могут ещё лежать в буфере воркера '
+                                 'или в незакоммиченной пачке (по умолчанию ENGAGEMENT_FLUSH_SECONDS + 60)')
+        parser.add_argument('--retain-days', type=int, default=30, help='Сколько дней хранить сырые события')
+        parser.add_argument('--hourly-retain-days', type=int, default=90, help='Сколько дней хранить часовые агрегаты')
+
+    def handle(self, *args, **options):
+        lag = options['lag_seconds']
+        if lag is None:
+            lag = getattr(settings, 'ENGAGEMENT_FLUSH_SECONDS', 30) + 60
+        cutoff = timezone.now() - timedelta(seconds=lag)
+        window = timedelta(minutes=options['window_minutes'])
+
+        total = 0
+        while True:
+            processed = self.rollup_batch(cutoff, window)
+            if processed is None:
+                break
+            total += processed
+        self.stdout.write(f'Свёрнуто событий: {total}')
+        self.compact(options['retain_days'], options['hourly_retain_days'])
+
+    @transaction.atomic
+    def rollup_batch(self, cutoff, window):
+        """Сворачивает следующее окно [rolled_until, +window) до cutoff. None — сворачивать нечего"""
+        watermark, _ = RollupWatermark.objects.get_or_create(name='engagement')
+        # Блокируем строку, чтобы два запуска не свернули одни и те же события дважды
+        watermark = RollupWatermark.objects.select_for_update().get(pk=watermark.pk)
+
+        pending = EngagementEvent.objects.filter(created_at__lt=cutoff)
+        if watermark.rolled_until:
+            if watermark.rolled_until >= cutoff:
+                return None
+            pending = pending.filter(created_at__gte=watermark.rolled_until)
+        # Окно начинаем с первого несвёрнутого события, пустые промежутки пропускаем
+        start = pending.order_by('created_at').values_list('created_at', flat=True).first()
+        if start is None:
+            watermark.rolled_until = cutoff
+            watermark.save(update_fields=['rolled_until'])
+            return None
+
+        end = min(start + window, cutoff)
+        events = pending.filter(created_at__lt=end)
+        totals = defaultdict(lambda: defaultdict(int))
+        processed = 0
+
+        for granularity, trunc in ((EngagementRollup.HOUR, TruncHour), (EngagementRollup.DAY, TruncDay)):
+            rows = (
+                events.annotate(bucket=trunc('created_at'))
+                .values('bucket', 'author_id', 'edit_id', 'kind')
+                .annotate(n=Count('id'))
+                .order_by()
+            )
+            for row in rows:
+                field, sign = DELTAS[row['kind']]
+                amount = sign * row['n']
+                # Счётчик эдита и общий счётчик автора (edit_id=0)
+                keys = [(granularity, row['bucket'], row['author_id'], 0)]
+                if row['edit_id']:
+                    keys.append((granularity, row['bucket'], row['author_id'], row['edit_id']))
+                for key in keys:
+                    totals[key][field] += amount
+                if granularity == EngagementRollup.HOUR:
+                    processed += row['n']
+
+        sketches = self.collect_viewers(events)
+        self.apply(totals, sketches)
+        self.update_edit_viewers(sketches)
+        watermark.rolled_until = end
+        watermark.save(update_fields=['rolled_until'])
+        return processed
+
+    def collect_viewers(self, events):
+        """HLL-скетчи зрителей по дням: на каждый эдит и на автора целиком"""
+        sketches = defaultdict(HyperLogLog)
+        rows = (
+            events.filter(kind=EngagementEvent.VIEW, actor_id__isnull=False)
+            .annotate(bucket=TruncDay('created_at'))
+            .values_list('bucket', 'author_id', 'edit_id', 'actor_id')
+        )
+        for bucket, author_id, edit_id, actor_id in rows.iterator():
+            sketches[(EngagementRollup.DAY, bucket, author_id, 0)].add(actor_id)
+            if edit_id:
+                sketches[(EngagementRollup.DAY, bucket, author_id, edit_id)].add(actor_id)
+        return sketches
+
+    def update_edit_viewers(self, sketches):
+        """Вливает дневные скетчи в общий скетч эдита и обновляет Edit.unique_viewers"""
+        per_edit = defaultdict(HyperLogLog)
+        for (_, _, _, edit_id), sketch in sketches.items():
+            if edit_id:
+                per_edit[edit_id].merge(sketch)
+
+        alive = set(Edit.objects.filter(pk__in=per_edit).values_list('pk', flat=True))
+        existing = ViewerSketch.objects.in_bulk(alive)
+        to_create, to_update, edits = [], [], []
+        for edit_id in alive:
+            sketch = per_edit[edit_id]
+            stored = existing.get(edit_id)
+            if stored is None:
+                stored = ViewerSketch(edit_id=edit_id)
+                to_create.append(stored)
+            else:
+                sketch.merge(HyperLogLog.from_bytes(stored.data))
+                to_update.append(stored)
+            stored.data = sketch.to_bytes()
+            edits.append(Edit(pk=edit_id, unique_viewers=sketch.count()))
+
+        ViewerSketch.objects.bulk_create(to_create, batch_size=500)
+        ViewerSketch.objects.bulk_update(to_update, ['data'], batch_size=500)
+        Edit.objects.bulk_update(edits, ['unique_viewers'], batch_size=500)
+
+    def apply(self, totals, sketches):
+        buckets = {key[1] for key in totals}
+        authors = {key[2] for key in totals}
+        existing = {
+            (r.granularity, r.bucket_start, r.author_id, r.edit_id): r
+            for r in EngagementRollup.objects.filter(bucket_start__in=buckets, author_id__in=authors)
+        }
+
+        to_create, to_update = [], []
+        for key, deltas in totals.items():
+            rollup = existing.get(key)
+            if rollup is None:
+                granularity, bucket_start, author_id, edit_id = key
+                rollup = EngagementRollup(
+                    granularity=granularity, bucket_start=bucket_start,
+                    author_id=author_id, edit_id=edit_id,
+                )
+                to_create.append(rollup)
+            else:
+                to_update.append(rollup)
+            for field, amount in deltas.items():
+                setattr(rollup, field, getattr(rollup, field) + amount)
+            if key in sketches:
+                rollup.viewers = HyperLogLog.from_bytes(rollup.viewers).merge(sketches[key]).to_bytes()
+
+        EngagementRollup.objects.bulk_create(to_create, batch_size=1000)
+        EngagementRollup.objects.bulk_update(to_update, ['views', 'likes', 'follows', 'viewers'], batch_size=1000)
+
+    def compact(self, retain_days, hourly_retain_days):
+        now = timezone.now()
+        rolled_until = RollupWatermark.objects.filter(name='engagement').values_list('rolled_until', flat=True).first()
+        # Удаляем только уже свёрнутые события
+        deleted = 0
+        if rolled_until:
+            deleted, _ = EngagementEvent.objects.filter(
+                created_at__lt=min(rolled_until, now - timedelta(days=retain_days))
+            ).delete()
+        hourly, _ = EngagementRollup.objects.filter(
+            granularity=EngagementRollup.HOUR,
+            bucket_start__lt=now - timedelta(days=hourly_retain_days),
+        ).delete()
+        self.stdout.write(f'Удалено старых событий: {deleted}, часовых агрегатов: {hourly}')
@@ -0,0 +1,49 @@
+from django.contrib import admin
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from edits.admin_large import job_queryset
+from edits.models import AdminJob, Edit
+
+
+def delete_edits(queryset, chunk_size):
+    # Удаляем пачками: каждая пачка — короткая транзакция, сигналы ставят надгробия файлам.
+    # id читаем по одной пачке, а не весь набор сразу
+    while True:
+        ids = list(queryset.values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            break
+        Edit.objects.filter(pk__in=ids).delete()
+
+
+# действие -> (модель, обработчик)
+JOB_HANDLERS = {
+    'delete_edits': (Edit, delete_edits),
+}
+
+
+class Command(BaseCommand):
+    help = 'Выполняет массовые действия, поставленные в очередь из админки'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--limit', type=int, default=10, help='Сколько задач взять за запуск')
+
+    def handle(self, *args, **options):
+        for job_id in AdminJob.objects.filter(status=AdminJob.PENDING).order_by('id').values_list('id', flat=True)[:options['limit']]:
+            # Захватываем задачу атомарно, чтобы два запуска не взяли одну и ту же
+            if not AdminJob.objects.filter(id=job_id, status=AdminJob.PENDING).update(status=AdminJob.RUNNING):
+                continue
+            job = AdminJob.objects.get(id=job_id)
+            try:
+                if job.action not in JOB_HANDLERS:
+                    raise ValueError(f'Неизвестное действие: {job.action}')
+                model, handler = JOB_HANDLERS[job.action]
+                handler(job_queryset(admin.site.get_model_admin(model), job), options['chunk_size'])
+                job.status = AdminJob.DONE
+            except Exception as e:
+                job.status = AdminJob.FAILED
+                job.error = str(e)
+            job.finished_at = timezone.now()
+            job.save(update_fields=['status', 'error', 'finished_at'])
+            self.stdout.write(f'Задача #{job.id} ({job.action}): {job.status}')
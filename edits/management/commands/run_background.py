@@ -0,0 +1,46 @@
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+# Фоновые команды и как часто их запускать (секунды).
+# Процесс — `worker` в Procfile; без него очередь админки, свёртка событий,
+# уборка хранилища и подсказки подписок не выполняются никогда
+SCHEDULE = (
+    ('run_admin_jobs', 30, {}),
+    ('rollup_engagement', 10 * 60, {}),
+    # Поиск сирот (--orphans) листает всё хранилище — его запускают вручную
+    ('sweep_storage', 60 * 60, {}),
+    ('compute_suggestions', 24 * 60 * 60, {}),
+)
+
+
+class Command(BaseCommand):
+    help = 'Бесконечный цикл: по расписанию запускает фоновые команды (процесс worker)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tick', type=int, default=5, help='Как часто проверять расписание, секунд')
+        parser.add_argument('--once', action='store_true', help='Запустить все команды один раз и выйти')
+
+    def handle(self, *args, **options):
+        last_run = {}
+        while True:
+            now = time.monotonic()
+            for name, interval, kwargs in SCHEDULE:
+                if options['once'] or now - last_run.get(name, -interval) >= interval:
+                    last_run[name] = now
+                    self.run(name, kwargs)
+            if options['once']:
+                return
+            time.sleep(options['tick'])
+
+    def run(self, name, kwargs):
+        close_old_connections()
+        try:
+            call_command(name, stdout=self.stdout, stderr=self.stderr, **kwargs)
+        except Exception as e:
+            # Одна упавшая команда не должна останавливать остальные
+            self.stderr.write(f'{name}: {e}')
+        finally:
+            close_old_connections()
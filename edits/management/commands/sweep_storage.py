@@ -0,0 +1,120 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F
+from django.utils import timezone
+
+from edits.models import Edit, Profile, StorageTombstone
+
+# Папки, куда модели загружают файлы (upload_to)
+MEDIA_DIRS = ('edits/videos/', 'edits/thumbnails/', 'avatars/')
+
+
+class Command(BaseCommand):
+    help = 'Удаляет из хранилища файлы удалённых эдитов и файлы-сироты без ссылок из БД'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--workers', type=int, default=4, help='Сколько файлов удалять параллельно')
+        parser.add_argument('--max-attempts', type=int, default=5)
+        parser.add_argument('--orphans', action='store_true', help='Дополнительно искать файлы-сироты')
+        parser.add_argument('--grace-hours', type=int, default=24,
+                            help='Не трогать сирот моложе N часов (загрузка могла ещё не сохраниться)')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        self.workers = max(1, options['workers'])
+
+        deleted = self.sweep_tombstones(options['batch_size'], options['max_attempts'])
+        self.stdout.write(f'Надгробия: удалено файлов {deleted}')
+
+        if options['orphans']:
+            orphans = self.sweep_orphans(options['batch_size'], timedelta(hours=options['grace_hours']))
+            self.stdout.write(f'Сироты: удалено файлов {orphans}')
+
+    def delete_batch(self, names):
+        """Удаляет пачку файлов с ограниченным параллелизмом, возвращает {name: ok}"""
+        if self.dry_run:
+            return {name: True for name in names}
+
+        def delete_one(name):
+            try:
+                default_storage.delete(name)
+                return name, True
+            except Exception as e:
+                self.stderr.write(f'Не удалось удалить {name}: {e}')
+                return name, False
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return dict(pool.map(delete_one, names))
+
+    def sweep_tombstones(self, batch_size, max_attempts):
+        total = 0
+        last_id = 0
+        while True:
+            batch = list(
+                StorageTombstone.objects
+                .filter(id__gt=last_id, attempts__lt=max_attempts)
+                .order_by('id')[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            results = self.delete_batch([t.name for t in batch])
+            done = [t.id for t in batch if results.get(t.name)]
+            failed = [t.id for t in batch if not results.get(t.name)]
+            total += len(done)
+
+            if not self.dry_run:
+                StorageTombstone.objects.filter(id__in=done).delete()
+                StorageTombstone.objects.filter(id__in=failed).update(attempts=F('attempts') + 1)
+        return total
+
+    def referenced_names(self):
+        names = set()
+        for video, thumbnail in Edit.objects.values_list('video', 'thumbnail').iterator():
+            names.update(n for n in (video, thumbnail) if n)
+        names.update(n for n in Profile.objects.values_list('avatar', flat=True).iterator() if n)
+        return names
+
+    def sweep_orphans(self, batch_size, grace):
+        referenced = self.referenced_names()
+        cutoff = timezone.now() - grace
+        candidates = []
+        skipped = 0
+
+        for folder in MEDIA_DIRS:
+            try:
+                _, files = default_storage.listdir(folder)
+            except NotImplementedError:
+                raise CommandError('Хранилище не поддерживает listdir — поиск сирот невозможен')
+            except FileNotFoundError:
+                continue
+
+            for filename in files:
+                name = folder + filename
+                if name in referenced:
+                    continue
+                try:
+                    if default_storage.get_modified_time(name) > cutoff:
+                        continue
+                except NotImplementedError:
+                    # Без возраста нельзя отличить сироту от свежей загрузки — молча ничего не удалять хуже, чем упасть
+                    raise CommandError('Хранилище не отдаёт время изменения файлов — поиск сирот невозможен')
+                except OSError as e:
+                    self.stderr.write(f'Не удалось узнать возраст {name}: {e}')
+                    skipped += 1
+                    continue
+                candidates.append(name)
+
+        if skipped:
+            self.stdout.write(f'Сироты: пропущено файлов с неизвестным возрастом {skipped}')
+        total = 0
+        for i in range(0, len(candidates), batch_size):
+            results = self.delete_batch(candidates[i:i + batch_size])
+            total += sum(results.values())
+        return total
@@ -0,0 +1,48 @@
+# Generated by Django 6.0.2 on 2026-10-19 12:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edits', '0008_edit_created_at_index_adminjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EngagementEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.PositiveSmallIntegerField(choices=[(1, 'view'), (2, 'like'), (3, 'unlike'), (4, 'follow'), (5, 'unfollow')])),
+                ('author_id', models.IntegerField()),
+                ('edit_id', models.IntegerField(null=True)),
+                ('actor_id', models.IntegerField(null=True)),
+                ('created_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='EngagementRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('h', 'hour'), ('d', 'day')], max_length=1)),
+                ('bucket_start', models.DateTimeField()),
+                ('author_id', models.IntegerField()),
+                ('edit_id', models.IntegerField(default=0)),
+                ('views', models.IntegerField(default=0)),
+                ('likes', models.IntegerField(default=0)),
+                ('follows', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('granularity', 'author_id', 'edit_id', 'bucket_start'), name='unique_engagement_bucket')],
+            },
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('rolled_until', models.DateTimeField(null=True)),
+            ],
+        ),
+    ]
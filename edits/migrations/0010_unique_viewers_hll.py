@@ -0,0 +1,31 @@
+# Generated by Django 6.0.2 on 2026-10-19 13:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edits', '0009_engagement_log'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='edit',
+            name='unique_viewers',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='engagementrollup',
+            name='viewers',
+            field=models.BinaryField(null=True),
+        ),
+        migrations.CreateModel(
+            name='ViewerSketch',
+            fields=[
+                ('edit', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='viewer_sketch', serialize=False, to='edits.edit')),
+                ('data', models.BinaryField()),
+            ],
+        ),
+    ]
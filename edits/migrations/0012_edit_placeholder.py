@@ -0,0 +1,33 @@
+# Generated by Django 6.0.2 on 2026-10-19 16:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edits', '0011_followsuggestion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='edit',
+            name='dominant_color',
+            field=models.CharField(blank=True, editable=False, max_length=7),
+        ),
+        migrations.AddField(
+            model_name='edit',
+            name='placeholder',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='edit',
+            name='thumb_height',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='edit',
+            name='thumb_width',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-19 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edits', '0012_edit_placeholder'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='adminjob',
+            name='filters',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='adminjob',
+            name='max_pk',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
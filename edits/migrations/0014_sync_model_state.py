@@ -0,0 +1,79 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:13
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edits', '0013_adminjob_filters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='category',
+            options={},
+        ),
+        migrations.AlterModelOptions(
+            name='edit',
+            options={},
+        ),
+        migrations.RemoveField(
+            model_name='edit',
+            name='updated_at',
+        ),
+        migrations.AlterField(
+            model_name='category',
+            name='name',
+            field=models.CharField(max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='edit',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='edits', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='edit',
+            name='category',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='edits.category'),
+        ),
+        migrations.AlterField(
+            model_name='edit',
+            name='description',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AlterField(
+            model_name='edit',
+            name='likes',
+            field=models.ManyToManyField(blank=True, related_name='liked_edits', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='edit',
+            name='tags',
+            field=models.ManyToManyField(blank=True, to='edits.tag'),
+        ),
+        migrations.AlterField(
+            model_name='edit',
+            name='thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='edits/thumbnails/'),
+        ),
+        migrations.AlterField(
+            model_name='edit',
+            name='title',
+            field=models.CharField(max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='edit',
+            name='video',
+            field=models.FileField(upload_to='edits/videos/', validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['mp4', 'mov', 'webm'])]),
+        ),
+        migrations.AlterField(
+            model_name='edit',
+            name='views_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -1,12 +1,18 @@
 import os
-import subprocess
+from functools import lru_cache
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import FileExtensionValidator
 from django.core.files.base import ContentFile
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-import imageio_ffmpeg
+from .placeholders import compute_placeholder
+
+@lru_cache(maxsize=1)
+def ffmpeg_path():
+    # imageio_ffmpeg тяжёлый, грузим только когда реально нужен ffmpeg
+    import imageio_ffmpeg
+    return imageio_ffmpeg.get_ffmpeg_exe()
 
 class Category(models.Model):
     name = models.CharField(max_length=100)
@@ -25,12 +31,19 @@ class Edit(models.Model):
         validators=[FileExtensionValidator(allowed_extensions=['mp4', 'mov', 'webm'])]
     )
     thumbnail = models.ImageField(upload_to='edits/thumbnails/', blank=True, null=True)
+    # Заглушка для сетки до загрузки превью (edits.placeholders)
+    placeholder = models.TextField(blank=True, editable=False)
+    dominant_color = models.CharField(max_length=7, blank=True, editable=False)
+    thumb_width = models.PositiveIntegerField(null=True, editable=False)
+    thumb_height = models.PositiveIntegerField(null=True, editable=False)
     tags = models.ManyToManyField(Tag, blank=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='edits')
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True)
     views_count = models.PositiveIntegerField(default=0)
+    # Оценка уникальных зрителей по ViewerSketch, обновляет rollup_engagement
+    unique_viewers = models.PositiveIntegerField(default=0, editable=False)
     likes = models.ManyToManyField(User, related_name='liked_edits', blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
     def save(self, *args, **kwargs):
         # Сохраняем видео на диск сервера
@@ -44,11 +57,13 @@ class Edit(models.Model):
                 print(f"Ошибка превью: {e}")
 
     def generate_thumbnail(self):
+        import subprocess
+
         # ВАЖНО: теперь берем .path (путь на диске), а не .url
         video_path = self.video.path 
         thumb_name = f"thumb_{self.pk}.jpg"
         temp_thumb = f"/tmp/{thumb_name}"
-        ffmpeg_bin = imageio_ffmpeg.get_ffmpeg_exe()
+        ffmpeg_bin = ffmpeg_path()
 
         command = [
             ffmpeg_bin, '-ss', '00:00:01', '-i', video_path,
@@ -63,13 +78,22 @@ class Edit(models.Model):
                 with open(temp_thumb, 'rb') as f:
                     # Сохраняем картинку в поле
                     self.thumbnail.save(thumb_name, ContentFile(f.read()), save=False)
+
+                # Заглушку считаем из того же кадра, пока он на диске
+                placeholder = {}
+                try:
+                    placeholder = compute_placeholder(temp_thumb)
+                except Exception as e:
+                    print(f"Ошибка заглушки: {e}")
+                for field, value in placeholder.items():
+                    setattr(self, field, value)
                 
                 # Чистим временный файл
                 if os.path.exists(temp_thumb):
                     os.remove(temp_thumb)
                 
-                # Обновляем только колонку thumbnail, чтобы не зациклить save()
-                Edit.objects.filter(pk=self.pk).update(thumbnail=self.thumbnail.name)
+                # Обновляем только колонки превью, чтобы не зациклить save()
+                Edit.objects.filter(pk=self.pk).update(thumbnail=self.thumbnail.name, **placeholder)
         except Exception as e:
             print(f"FFmpeg fail: {e}")
 
@@ -81,6 +105,104 @@ class Profile(models.Model):
 
     def __str__(self): return self.user.username
 
+class StorageTombstone(models.Model):
+    """Файл в хранилище, который больше никому не нужен и ждёт удаления (sweep_storage)"""
+    name = models.CharField(max_length=255, unique=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self): return self.name
+
+class AdminJob(models.Model):
+    """Массовое действие из админки, которое выполняется вне запроса (run_admin_jobs)"""
+    PENDING, RUNNING, DONE, FAILED = 'pending', 'running', 'done', 'failed'
+    STATUS_CHOICES = [(PENDING, 'В очереди'), (RUNNING, 'Выполняется'), (DONE, 'Готово'), (FAILED, 'Ошибка')]
+
+    action = models.CharField(max_length=50)
+    object_ids = models.JSONField(default=list)
+    # «Выбрать все»: GET-параметры списка и самый новый pk на момент постановки
+    filters = models.JSONField(null=True, blank=True)
+    max_pk = models.BigIntegerField(null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING, db_index=True)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        size = 'по фильтру' if self.filters is not None else len(self.object_ids)
+        return f"{self.action} ({size}) — {self.status}"
+
+class EngagementEvent(models.Model):
+    """
+    Сырое событие вовлечённости. Только дописываем (пачками, см. edits.events),
+    без внешних ключей — удаление эдита или юзера не должно трогать лог.
+    """
+    VIEW, LIKE, UNLIKE, FOLLOW, UNFOLLOW = 1, 2, 3, 4, 5
+    KIND_CHOICES = [(VIEW, 'view'), (LIKE, 'like'), (UNLIKE, 'unlike'), (FOLLOW, 'follow'), (UNFOLLOW, 'unfollow')]
+
+    kind = models.PositiveSmallIntegerField(choices=KIND_CHOICES)
+    author_id = models.IntegerField()  # чей контент / на кого подписались
+    edit_id = models.IntegerField(null=True)
+    actor_id = models.IntegerField(null=True)
+    created_at = models.DateTimeField(db_index=True)
+
+class EngagementRollup(models.Model):
+    """Агрегаты по часам и дням. edit_id=0 — сумма по всем эдитам автора"""
+    HOUR, DAY = 'h', 'd'
+    GRANULARITY_CHOICES = [(HOUR, 'hour'), (DAY, 'day')]
+
+    granularity = models.CharField(max_length=1, choices=GRANULARITY_CHOICES)
+    bucket_start = models.DateTimeField()
+    author_id = models.IntegerField()
+    edit_id = models.IntegerField(default=0)
+    views = models.IntegerField(default=0)
+    likes = models.IntegerField(default=0)
+    follows = models.IntegerField(default=0)
+    # HLL-скетч зрителей за день (только для дневных агрегатов)
+    viewers = models.BinaryField(null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['granularity', 'author_id', 'edit_id', 'bucket_start'],
+                name='unique_engagement_bucket',
+            ),
+        ]
+
+class ViewerSketch(models.Model):
+    """HLL-скетч всех зрителей эдита (edits.hll). Отдельно от Edit, чтобы не грузить его в ленты"""
+    edit = models.OneToOneField(Edit, on_delete=models.CASCADE, primary_key=True, related_name='viewer_sketch')
+    data = models.BinaryField()
+
+class FollowSuggestion(models.Model):
+    """Предрасчитанные «на кого подписаться» (compute_suggestions), top-K на пользователя"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='follow_suggestions')
+    suggested = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'suggested'], name='unique_follow_suggestion'),
+        ]
+        indexes = [models.Index(fields=['user', '-score'], name='suggestion_user_score')]
+
+class RollupWatermark(models.Model):
+    """
+    До какого момента лог уже свёрнут в EngagementRollup (события с created_at < rolled_until).
+    Граница по времени, а не по id: пачки из разных воркеров коммитятся не в порядке id.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    rolled_until = models.DateTimeField(null=True)
+
+@receiver(post_delete, sender=Edit)
+def tombstone_edit_files(sender, instance, **kwargs):
+    # Сами файлы не трогаем — их удалит фоновый sweeper, запрос не ждёт хранилище
+    names = [f.name for f in (instance.video, instance.thumbnail) if f and f.name]
+    StorageTombstone.objects.bulk_create(
+        [StorageTombstone(name=n) for n in names], ignore_conflicts=True
+    )
+
 # Сигналы оставляем как есть — они бронебойные
 @receiver(post_save, sender=User)
 def create_profile(sender, instance, created, **kwargs):
@@ -0,0 +1,35 @@
+"""
+Мини-превью для сетки: крошечный JPEG в data URI, доминирующий цвет и размеры.
+Всё это рендерится прямо в HTML, поэтому плитка занимает место сразу, без скачка.
+"""
+import base64
+import io
+
+PLACEHOLDER_SIZE = 16
+
+
+def compute_placeholder(fp):
+    """fp — файл с картинкой превью. Возвращает поля для Edit"""
+    # Pillow нужен только при генерации превью, не при старте воркера
+    from PIL import Image
+
+    with Image.open(fp) as img:
+        img = img.convert('RGB')
+        width, height = img.size
+
+        # Самый частый цвет после сведения к небольшой палитре
+        palette = img.resize((64, 64)).quantize(colors=5)
+        _, index = max(palette.getcolors())
+        r, g, b = palette.getpalette()[index * 3:index * 3 + 3]
+
+        tiny = img.copy()
+        tiny.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+        buffer = io.BytesIO()
+        tiny.save(buffer, format='JPEG', quality=40)
+
+    return {
+        'placeholder': 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode(),
+        'dominant_color': f'#{r:02x}{g:02x}{b:02x}',
+        'thumb_width': width,
+        'thumb_height': height,
+    }
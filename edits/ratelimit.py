@@ -0,0 +1,80 @@
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'30/m' -> (30, 60)"""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+def get_rates(scope):
+    """Лимиты берём только из settings.RATELIMITS — {'user': '30/m', 'ip': '120/m'}"""
+    return getattr(settings, 'RATELIMITS', {}).get(scope, {})
+
+
+def client_ip(request):
+    """
+    IP клиента за RATELIMIT_PROXY_HOPS доверенными прокси.
+    Каждый прокси дописывает адрес в конец X-Forwarded-For, поэтому берём запись
+    N-ю с конца: всё левее неё прислал сам клиент и может быть подделано.
+    """
+    hops = getattr(settings, 'RATELIMIT_PROXY_HOPS', 0)
+    if hops:
+        forwarded = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+        if len(forwarded) >= hops:
+            return forwarded[-hops]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def hit(key, limit, period):
+    """
+    Скользящее окно из двух счётчиков: текущее окно + взвешенный остаток прошлого.
+    На каждый запрос — один атомарный incr и один get, без блокировок.
+    Возвращает (превышен ли лимит, сколько секунд ждать).
+    """
+    now = time.time()
+    window = int(now // period)
+    elapsed = now - window * period
+
+    current_key = f'rl:{key}:{window}'
+    cache.add(current_key, 0, period * 2)
+    try:
+        current = cache.incr(current_key)
+    except ValueError:
+        # Ключ успел протухнуть между add и incr
+        cache.set(current_key, 1, period * 2)
+        current = 1
+
+    previous = cache.get(f'rl:{key}:{window - 1}', 0)
+    estimated = previous * (period - elapsed) / period + current
+    return estimated > limit, int(period - elapsed) + 1
+
+
+def ratelimit(scope):
+    """Ограничивает частоту запросов к вьюхе отдельно на пользователя и на IP"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            rates = get_rates(scope)
+            idents = {'ip': client_ip(request)}
+            if request.user.is_authenticated:
+                idents['user'] = request.user.pk
+            for kind, ident in idents.items():
+                if not rates.get(kind):
+                    continue
+                limit, period = parse_rate(rates[kind])
+                limited, retry_after = hit(f'{scope}:{kind}:{ident}', limit, period)
+                if limited:
+                    response = JsonResponse({'error': 'Too many requests'}, status=429)
+                    response['Retry-After'] = str(retry_after)
+                    return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,159 @@
+"""
+«На кого подписаться»: друзья друзей по графу подписок + авторы, которых лайкают
+те же люди. Считается пачкой (compute_suggestions), вьюха только читает top-K.
+"""
+import math
+from collections import Counter, defaultdict
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, F
+
+from .models import Edit, FollowSuggestion, Profile
+
+TOP_K = 20
+LIKE_WEIGHT = 0.5
+CO_LIKE_WEIGHT = 0.3
+# Сколько любимых авторов пользователя учитывать в co-like, иначе пары растут квадратично
+MAX_LIKED_AUTHORS = 50
+# Сколько подписок цели разбирать в refresh_after_follow, чтобы не раздувать IN-списки
+REFRESH_CANDIDATES = TOP_K * 10
+
+
+def load_follow_graph():
+    """Разреженный граф подписок в user id: {кто: {на кого}}"""
+    profile_user = dict(Profile.objects.values_list('id', 'user_id'))
+    graph = defaultdict(set)
+    rows = Profile.following.through.objects.values_list('from_profile_id', 'to_profile_id')
+    for src, dst in rows.iterator():
+        graph[profile_user[src]].add(profile_user[dst])
+    return graph
+
+
+def load_liked_authors():
+    """{пользователь: Counter(автор: сколько его эдитов лайкнул)}"""
+    liked = defaultdict(Counter)
+    rows = Edit.likes.through.objects.values_list('user_id', 'edit__author_id')
+    for user_id, author_id in rows.iterator():
+        if user_id != author_id:
+            liked[user_id][author_id] += 1
+    return liked
+
+
+def co_liked_authors(liked):
+    """{a: Counter(b: сколько пользователей лайкают и a, и b)}"""
+    co = defaultdict(Counter)
+    for authors in liked.values():
+        top = [a for a, _ in authors.most_common(MAX_LIKED_AUTHORS)]
+        for a in top:
+            for b in top:
+                if a != b:
+                    co[a][b] += 1
+    return co
+
+
+def hub_weight(out_degree):
+    # Подписки «хаба», который читает всех подряд, значат меньше
+    return 1 / math.log(2 + out_degree)
+
+
+def score_user(user_id, graph, liked, co):
+    following = graph.get(user_id, set())
+    scores = Counter()
+
+    for friend in following:
+        out = graph.get(friend)
+        if out:
+            weight = hub_weight(len(out))
+            for candidate in out:
+                scores[candidate] += weight
+
+    for author, count in liked.get(user_id, {}).items():
+        scores[author] += LIKE_WEIGHT * math.log1p(count)
+        for other, together in co.get(author, {}).items():
+            scores[other] += CO_LIKE_WEIGHT * math.log1p(together)
+
+    for excluded in (user_id, *following):
+        scores.pop(excluded, None)
+    return scores.most_common(TOP_K)
+
+
+def compute_all(batch_size=500):
+    """Пересчитывает подсказки для всех пользователей, возвращает число записей"""
+    graph = load_follow_graph()
+    liked = load_liked_authors()
+    co = co_liked_authors(liked)
+
+    total = 0
+    user_ids = list(User.objects.order_by('id').values_list('id', flat=True))
+    for i in range(0, len(user_ids), batch_size):
+        chunk = user_ids[i:i + batch_size]
+        rows = [
+            FollowSuggestion(user_id=user_id, suggested_id=suggested_id, score=score)
+            for user_id in chunk
+            for suggested_id, score in score_user(user_id, graph, liked, co)
+        ]
+        with transaction.atomic():
+            FollowSuggestion.objects.filter(user_id__in=chunk).delete()
+            FollowSuggestion.objects.bulk_create(rows, batch_size=1000)
+        total += len(rows)
+    return total
+
+
+def two_hop_scores(friends, candidates):
+    """Часть score_user по подпискам друзей — только для заданных кандидатов (friends — подзапрос user_id)"""
+    through = Profile.following.through.objects
+    paths = through.filter(from_profile__user_id__in=friends, to_profile__user_id__in=candidates)
+    # Число подписок считаем только у друзей, которые ведут хотя бы к одному кандидату
+    out_degree = dict(
+        through.filter(from_profile__user_id__in=paths.values('from_profile__user_id'))
+        .values('from_profile__user_id').annotate(n=Count('id'))
+        .values_list('from_profile__user_id', 'n')
+    )
+    scores = Counter()
+    for friend, candidate in paths.values_list('from_profile__user_id', 'to_profile__user_id').iterator():
+        scores[candidate] += hub_weight(out_degree[friend])
+    return scores
+
+
+def refresh_after_follow(user_id, target_id, followed):
+    """Точечная правка после toggle_follow — до следующего полного пересчёта"""
+    if followed:
+        FollowSuggestion.objects.filter(user_id=user_id, suggested_id=target_id).delete()
+
+    through = Profile.following.through.objects
+    their_following = through.filter(from_profile__user_id=target_id)
+    # Подписки пользователя остаются подзапросом: их может быть сколько угодно
+    my_following = Profile.objects.filter(followers__user_id=user_id).values('user_id')
+    # Работаем внутри запроса на подписку, поэтому берём не больше REFRESH_CANDIDATES
+    # самых свежих подписок цели — остальное досчитает compute_suggestions
+    candidates = set(
+        their_following.exclude(to_profile__user_id__in=my_following)
+        .exclude(to_profile__user_id=user_id)
+        .order_by('-id').values_list('to_profile__user_id', flat=True)[:REFRESH_CANDIDATES]
+    )
+    if not candidates:
+        return
+
+    delta = hub_weight(their_following.count()) * (1 if followed else -1)
+    FollowSuggestion.objects.filter(user_id=user_id, suggested_id__in=candidates).update(score=F('score') + delta)
+    if not followed:
+        return
+
+    existing = set(
+        FollowSuggestion.objects.filter(user_id=user_id, suggested_id__in=candidates)
+        .values_list('suggested_id', flat=True)
+    )
+    # Новых кандидатов ранжируем по всем подпискам пользователя, а не только по новой
+    ranked = two_hop_scores(my_following, candidates - existing).most_common(TOP_K)
+    with transaction.atomic():
+        FollowSuggestion.objects.bulk_create(
+            [FollowSuggestion(user_id=user_id, suggested_id=candidate, score=score) for candidate, score in ranked],
+            ignore_conflicts=True,
+        )
+        # Держим у пользователя не больше TOP_K лучших подсказок
+        keep = list(
+            FollowSuggestion.objects.filter(user_id=user_id)
+            .order_by('-score').values_list('id', flat=True)[:TOP_K]
+        )
+        FollowSuggestion.objects.filter(user_id=user_id).exclude(id__in=keep).delete()
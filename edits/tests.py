@@ -1,3 +1,475 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver
+from django.utils import timezone
+
+from core.boot import warm_up
+
+from . import events
+from .hll import DENSE, SPARSE, HyperLogLog
+from .models import AdminJob, Edit, EngagementEvent, EngagementRollup, FollowSuggestion, StorageTombstone
+from .placeholders import compute_placeholder
+from .ratelimit import client_ip, hit
+from .suggestions import (
+    TOP_K, co_liked_authors, compute_all, load_follow_graph, load_liked_authors, refresh_after_follow, score_user,
+)
+
+
+class EventBufferMixin:
+    """Без фонового потока: буфер событий сбрасываем сами, внутри транзакции теста"""
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch('edits.events.start_flusher')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(events.flush)
+
+
+class EventBufferTests(EventBufferMixin, TestCase):
+    def test_flush_writes_recorded_events(self):
+        events.record(EngagementEvent.VIEW, 1, 2, 3)
+        events.record(EngagementEvent.FOLLOW, 1, actor_id=3)
+        self.assertFalse(EngagementEvent.objects.exists())
+
+        events.flush()
+        self.assertEqual(
+            list(EngagementEvent.objects.order_by('id').values_list('kind', 'author_id', 'edit_id', 'actor_id')),
+            [(EngagementEvent.VIEW, 1, 2, 3), (EngagementEvent.FOLLOW, 1, None, 3)],
+        )
+        self.assertEqual(events._buffer, [])
+
+    @override_settings(ENGAGEMENT_BATCH_SIZE=2)
+    def test_record_flushes_full_batch(self):
+        events.record(EngagementEvent.VIEW, 1, 2, 3)
+        events.record(EngagementEvent.VIEW, 1, 2, 4)
+        self.assertEqual(EngagementEvent.objects.count(), 2)
+
+
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    @mock.patch('edits.ratelimit.time.time')
+    def test_hit_limits_within_window(self, now):
+        now.return_value = 600.0
+        results = [hit('t', 3, 60)[0] for _ in range(4)]
+        self.assertEqual(results, [False, False, False, True])
+
+    @mock.patch('edits.ratelimit.time.time')
+    def test_hit_weights_previous_window(self, now):
+        now.return_value = 600.0
+        for _ in range(4):
+            hit('t', 4, 60)
+        # Середина следующего окна: от прошлого осталась половина — 2 запроса
+        now.return_value = 690.0
+        self.assertEqual([hit('t', 4, 60)[0] for _ in range(3)], [False, False, True])
+        # Через два окна прошлые запросы уже не считаются
+        now.return_value = 780.0
+        self.assertFalse(hit('t', 4, 60)[0])
+
+    @mock.patch('edits.ratelimit.time.time')
+    def test_hit_retry_after(self, now):
+        now.return_value = 615.0
+        self.assertEqual(hit('t', 1, 60)[1], 46)
+
+    def test_client_ip_takes_entry_from_trusted_proxy(self):
+        request = RequestFactory().get('/', HTTP_X_FORWARDED_FOR='6.6.6.6, 1.2.3.4', REMOTE_ADDR='10.0.0.1')
+        with override_settings(RATELIMIT_PROXY_HOPS=1):
+            self.assertEqual(client_ip(request), '1.2.3.4')
+        with override_settings(RATELIMIT_PROXY_HOPS=2):
+            self.assertEqual(client_ip(request), '6.6.6.6')
+        with override_settings(RATELIMIT_PROXY_HOPS=0):
+            self.assertEqual(client_ip(request), '10.0.0.1')
+
+    def test_client_ip_without_header_falls_back_to_remote_addr(self):
+        request = RequestFactory().get('/', REMOTE_ADDR='10.0.0.1')
+        with override_settings(RATELIMIT_PROXY_HOPS=1):
+            self.assertEqual(client_ip(request), '10.0.0.1')
+
+
+class ToggleLikeTests(EventBufferMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.user = User.objects.create_user('fan', password='pass')
+        author = User.objects.create_user('author', password='pass')
+        # С готовой обложкой save() не запускает ffmpeg
+        self.edit = Edit.objects.create(title='edit', video='edits/videos/x.mp4', thumbnail='x.jpg', author=author)
+        self.url = f'/toggle-like/{self.edit.id}/'
+        self.client.force_login(self.user)
+
+    def test_desired_state_is_idempotent(self):
+        response = self.client.post(self.url, {'liked': '1'})
+        self.assertEqual(response.json(), {'liked': True, 'count': 1})
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {'liked': '1'})
+        self.assertEqual(response.json(), {'liked': True, 'count': 1})
+        self.assertFalse([q for q in queries if q['sql'].startswith('INSERT')])
+
+        response = self.client.post(self.url, {'liked': '0'})
+        self.assertEqual(response.json(), {'liked': False, 'count': 0})
+        self.assertFalse(self.edit.likes.exists())
+
+    def test_without_desired_state_toggles(self):
+        self.assertTrue(self.client.post(self.url).json()['liked'])
+        self.assertFalse(self.client.post(self.url).json()['liked'])
+
+    @override_settings(RATELIMITS={'like': {'user': '2/m'}})
+    def test_rate_limited(self):
+        for _ in range(2):
+            self.assertEqual(self.client.post(self.url).status_code, 200)
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+
+class LargeAdminTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', password='pass')
+        self.client.force_login(self.admin)
+        self.edits = [
+            Edit.objects.create(title=f'edit {i}', video='edits/videos/x.mp4', thumbnail='x.jpg', author=self.admin)
+            for i in range(5)
+        ]
+        self.url = '/admin/edits/edit/'
+
+    def test_cursor_page_counts_whole_set(self):
+        with mock.patch('edits.admin.EditAdmin.list_per_page', 2):
+            response = self.client.get(self.url, {'cursor': self.edits[3].pk, 'p': 2})
+        cl = response.context['cl']
+        self.assertEqual(cl.result_count, 5)
+        self.assertEqual([e.pk for e in cl.result_list], [self.edits[2].pk, self.edits[1].pk])
+
+    def test_select_across_stores_filters_and_runs_over_whole_set(self):
+        other = User.objects.create_user('other')
+        kept = Edit.objects.create(title='kept', video='edits/videos/x.mp4', thumbnail='x.jpg', author=other)
+        response = self.client.post(
+            f'{self.url}?cursor={self.edits[3].pk}&author__id__exact={self.admin.pk}',
+            {'action': 'delete_in_background', 'select_across': '1', 'index': 0,
+             '_selected_action': [self.edits[2].pk]},
+        )
+        self.assertEqual(response.status_code, 302)
+        job = AdminJob.objects.get()
+        self.assertEqual(job.object_ids, [])
+        self.assertEqual(job.filters, {'author__id__exact': [str(self.admin.pk)]})
+
+        # Созданное после постановки задачи не трогаем
+        late = Edit.objects.create(title='late', video='edits/videos/x.mp4', thumbnail='x.jpg', author=self.admin)
+        call_command('run_admin_jobs', chunk_size=2, stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, AdminJob.DONE)
+        self.assertCountEqual(Edit.objects.values_list('pk', flat=True), [kept.pk, late.pk])
+
+
+class RollupTests(TestCase):
+    def event(self, minutes_ago, kind=EngagementEvent.VIEW):
+        return EngagementEvent.objects.create(
+            kind=kind, author_id=1, edit_id=2, actor_id=3,
+            created_at=timezone.now() - timedelta(minutes=minutes_ago),
+        )
+
+    def views(self):
+        return sum(EngagementRollup.objects.filter(granularity=EngagementRollup.DAY, edit_id=0).values_list('views', flat=True))
+
+    def test_skips_events_inside_lag(self):
+        self.event(10)
+        self.event(0)
+        call_command('rollup_engagement', lag_seconds=120, stdout=StringIO())
+        self.assertEqual(self.views(), 1)
+
+    def test_events_inside_lag_are_rolled_up_later(self):
+        self.event(10)
+        call_command('rollup_engagement', lag_seconds=120, stdout=StringIO())
+        # Свежая пачка воркера: до конца лага её не трогаем, но и не теряем
+        self.event(1)
+        call_command('rollup_engagement', lag_seconds=120, stdout=StringIO())
+        self.assertEqual(self.views(), 1)
+        call_command('rollup_engagement', lag_seconds=0, stdout=StringIO())
+        self.assertEqual(self.views(), 2)
+
+
+class HyperLogLogTests(SimpleTestCase):
+    def sketch(self, values):
+        hll = HyperLogLog()
+        for value in values:
+            hll.add(value)
+        return hll
+
+    def test_estimate_error(self):
+        for n in (10, 1000, 10000, 100000):
+            with self.subTest(n=n):
+                estimate = self.sketch(range(n)).count()
+                # Стандартная ошибка при 1024 регистрах ~3%, с запасом — 10%
+                self.assertLess(abs(estimate - n) / n, 0.1)
+
+    def test_duplicates_do_not_count(self):
+        self.assertEqual(self.sketch([1, 2, 3] * 100).count(), self.sketch([1, 2, 3]).count())
+
+    def test_round_trip_sparse_and_dense(self):
+        for n, encoding in ((50, SPARSE), (5000, DENSE)):
+            with self.subTest(n=n):
+                sketch = self.sketch(range(n))
+                data = sketch.to_bytes()
+                self.assertEqual(data[0], encoding)
+                self.assertEqual(HyperLogLog.from_bytes(data).registers, sketch.registers)
+
+    def test_empty_round_trip(self):
+        self.assertEqual(HyperLogLog.from_bytes(None).count(), 0)
+        self.assertEqual(HyperLogLog.from_bytes(HyperLogLog().to_bytes()).count(), 0)
+
+    def test_merge_is_idempotent_and_commutative(self):
+        a = self.sketch(range(0, 3000))
+        b = self.sketch(range(2000, 5000))
+        registers = bytearray(a.registers)
+        self.assertEqual(HyperLogLog(a.registers).merge(a).registers, registers)
+
+        ab = HyperLogLog(a.registers).merge(b)
+        ba = HyperLogLog(b.registers).merge(a)
+        self.assertEqual(ab.registers, ba.registers)
+        self.assertEqual(ab.registers, self.sketch(range(5000)).registers)
+
+
+class RefreshAfterFollowTests(TestCase):
+    def setUp(self):
+        self.me = User.objects.create_user('me')
+        self.friend = User.objects.create_user('friend')
+        self.target = User.objects.create_user('target')
+        self.others = [User.objects.create_user(f'u{i}') for i in range(TOP_K + 5)]
+        self.me.profile.following.add(self.friend.profile)
+        self.target.profile.following.add(*(u.profile for u in self.others))
+        # На последнего подписан ещё и друг — у него два пути и выше счёт
+        self.friend.profile.following.add(self.others[-1].profile)
+
+    def test_inserts_best_candidates_and_trims_to_top_k(self):
+        FollowSuggestion.objects.bulk_create(
+            FollowSuggestion(user=self.me, suggested=User.objects.create_user(f'old{i}'), score=0.01)
+            for i in range(TOP_K)
+        )
+        self.me.profile.following.add(self.target.profile)
+        refresh_after_follow(self.me.id, self.target.id, True)
+
+        suggested = list(
+            FollowSuggestion.objects.filter(user=self.me).order_by('-score').values_list('suggested_id', flat=True)
+        )
+        self.assertEqual(len(suggested), TOP_K)
+        self.assertEqual(suggested[0], self.others[-1].id)
+        self.assertFalse(FollowSuggestion.objects.filter(user=self.me, suggested__username__startswith='old').exists())
+
+    def test_candidates_are_capped_to_recent_followings(self):
+        self.me.profile.following.add(self.target.profile)
+        with mock.patch('edits.suggestions.REFRESH_CANDIDATES', 3):
+            refresh_after_follow(self.me.id, self.target.id, True)
+        # В выборку попали только три последние подписки цели
+        self.assertCountEqual(
+            FollowSuggestion.objects.filter(user=self.me).values_list('suggested_id', flat=True),
+            [u.id for u in self.others[-3:]],
+        )
+
+    def test_follow_response_survives_refresh_failure(self):
+        self.client.force_login(self.me)
+        with mock.patch('edits.views.refresh_after_follow', side_effect=DatabaseError('too many variables')):
+            response = self.client.post(f'/toggle-follow/{self.target.username}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['is_followed'])
+
+
+class UniqueViewersTests(EventBufferMixin, TestCase):
+    def test_views_from_two_users_reach_edit_unique_viewers(self):
+        author = User.objects.create_user('author')
+        edit = Edit.objects.create(title='edit', video='edits/videos/x.mp4', thumbnail='x.jpg', author=author)
+        for username in ('first', 'second'):
+            self.client.force_login(User.objects.create_user(username))
+            for _ in range(2):
+                self.assertEqual(self.client.post(f'/increment-views/{edit.id}/').status_code, 200)
+
+        events.flush()
+        call_command('rollup_engagement', lag_seconds=0, stdout=StringIO())
+
+        edit.refresh_from_db()
+        self.assertEqual(edit.views_count, 4)
+        self.assertEqual(edit.unique_viewers, 2)
+        self.assertEqual(HyperLogLog.from_bytes(edit.viewer_sketch.data).count(), 2)
+
+
+class RunBackgroundTests(SimpleTestCase):
+    @mock.patch('edits.management.commands.run_background.close_old_connections')
+    @mock.patch('edits.management.commands.run_background.call_command')
+    def test_once_runs_every_command_despite_failures(self, call, _):
+        call.side_effect = [RuntimeError('boom'), None, None, None]
+        stderr = StringIO()
+        call_command('run_background', once=True, stdout=StringIO(), stderr=stderr)
+        self.assertEqual(
+            [c.args[0] for c in call.call_args_list],
+            ['run_admin_jobs', 'rollup_engagement', 'sweep_storage', 'compute_suggestions'],
+        )
+        self.assertIn('run_admin_jobs: boom', stderr.getvalue())
+
+
+class SweepStorageTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.storage = FileSystemStorage(location=self.root)
+        patcher = mock.patch('edits.management.commands.sweep_storage.default_storage', self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.author = User.objects.create_user('author')
+
+    def put(self, name, hours_old=0):
+        self.storage.save(name, ContentFile(b'x'))
+        stamp = time.time() - hours_old * 3600
+        os.utime(self.storage.path(name), (stamp, stamp))
+
+    def sweep(self, *args):
+        call_command('sweep_storage', *args, stdout=StringIO(), stderr=StringIO())
+
+    def test_deleting_edit_tombstones_its_files(self):
+        edit = Edit.objects.create(
+            title='edit', video='edits/videos/a.mp4', thumbnail='edits/thumbnails/a.jpg', author=self.author,
+        )
+        edit.delete()
+        self.assertCountEqual(
+            StorageTombstone.objects.values_list('name', flat=True),
+            ['edits/videos/a.mp4', 'edits/thumbnails/a.jpg'],
+        )
+
+    def test_sweep_tombstones_removes_done_and_retries_failed(self):
+        self.put('edits/videos/a.mp4')
+        ok = StorageTombstone.objects.create(name='edits/videos/a.mp4')
+        failed = StorageTombstone.objects.create(name='edits/videos/b.mp4')
+        delete = self.storage.delete
+
+        def flaky_delete(name):
+            if name == failed.name:
+                raise OSError('storage is down')
+            delete(name)
+
+        with mock.patch.object(self.storage, 'delete', flaky_delete):
+            self.sweep()
+        self.assertFalse(self.storage.exists('edits/videos/a.mp4'))
+        self.assertFalse(StorageTombstone.objects.filter(pk=ok.pk).exists())
+        failed.refresh_from_db()
+        self.assertEqual(failed.attempts, 1)
+
+    def test_orphans_skip_referenced_and_fresh_files(self):
+        Edit.objects.create(title='edit', video='edits/videos/kept.mp4', thumbnail='x.jpg', author=self.author)
+        self.put('edits/videos/kept.mp4', hours_old=48)
+        self.put('edits/videos/orphan.mp4', hours_old=48)
+        self.put('edits/videos/fresh.mp4', hours_old=1)
+
+        self.sweep('--orphans', '--grace-hours', '24')
+        self.assertEqual(sorted(self.storage.listdir('edits/videos/')[1]), ['fresh.mp4', 'kept.mp4'])
+
+    def test_orphans_fail_without_modified_time(self):
+        self.put('edits/videos/orphan.mp4', hours_old=48)
+        with mock.patch.object(self.storage, 'get_modified_time', side_effect=NotImplementedError):
+            with self.assertRaises(CommandError):
+                self.sweep('--orphans')
+        self.assertTrue(self.storage.exists('edits/videos/orphan.mp4'))
+
+
+class ComputeSuggestionsTests(TestCase):
+    def setUp(self):
+        self.me, self.friend, self.hub, self.a, self.b, self.c = (
+            User.objects.create_user(name) for name in ('me', 'friend', 'hub', 'a', 'b', 'c')
+        )
+        self.me.profile.following.add(self.friend.profile, self.hub.profile)
+        self.friend.profile.following.add(self.a.profile, self.b.profile)
+        # Хаб читает всех подряд — его подписки весят меньше
+        self.hub.profile.following.add(self.b.profile, self.c.profile, self.friend.profile, self.me.profile)
+
+    def test_score_user_ranks_two_hop_candidates(self):
+        graph = load_follow_graph()
+        scores = dict(score_user(self.me.id, graph, {}, {}))
+        # Себя и тех, на кого уже подписан, не предлагаем
+        self.assertEqual(set(scores), {self.a.id, self.b.id, self.c.id})
+        self.assertGreater(scores[self.b.id], scores[self.a.id])
+        self.assertGreater(scores[self.a.id], scores[self.c.id])
+
+    def test_score_user_counts_liked_authors(self):
+        Edit.objects.create(title='edit', video='edits/videos/x.mp4', thumbnail='x.jpg', author=self.c).likes.add(self.me)
+        liked = load_liked_authors()
+        scores = dict(score_user(self.me.id, load_follow_graph(), liked, co_liked_authors(liked)))
+        self.assertGreater(scores[self.c.id], scores[self.a.id])
+
+    def test_compute_all_replaces_rows(self):
+        FollowSuggestion.objects.create(user=self.me, suggested=self.friend, score=100)
+        total = compute_all(batch_size=2)
+        rows = FollowSuggestion.objects.filter(user=self.me).order_by('-score').values_list('suggested_id', flat=True)
+        self.assertEqual(list(rows), [self.b.id, self.a.id, self.c.id])
+        self.assertEqual(total, FollowSuggestion.objects.count())
+
+
+def image_bytes(size=(40, 20), color=(200, 30, 30), fmt='PNG'):
+    from PIL import Image
+
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+class PlaceholderTests(TestCase):
+    def test_compute_placeholder(self):
+        for fmt in ('PNG', 'JPEG'):
+            with self.subTest(fmt=fmt):
+                fields = compute_placeholder(BytesIO(image_bytes(fmt=fmt)))
+                self.assertEqual(set(fields), {'placeholder', 'dominant_color', 'thumb_width', 'thumb_height'})
+                self.assertEqual((fields['thumb_width'], fields['thumb_height']), (40, 20))
+                self.assertTrue(fields['placeholder'].startswith('data:image/jpeg;base64,'))
+                self.assertRegex(fields['dominant_color'], r'^#[0-9a-f]{6}$')
+        # Однотонная PNG без потерь — цвет точный
+        self.assertEqual(compute_placeholder(BytesIO(image_bytes()))['dominant_color'], '#c81e1e')
+
+    def test_backfill_fills_empty_and_skips_without_thumbnail(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        storage = FileSystemStorage(location=root)
+        storage.save('edits/thumbnails/a.png', ContentFile(image_bytes()))
+
+        author = User.objects.create_user('author')
+        with mock.patch.object(Edit._meta.get_field('thumbnail'), 'storage', storage):
+            pending = Edit.objects.create(
+                title='pending', video='edits/videos/a.mp4', thumbnail='edits/thumbnails/a.png', author=author,
+            )
+            done = Edit.objects.create(
+                title='done', video='edits/videos/b.mp4', thumbnail='edits/thumbnails/a.png', author=author,
+            )
+            Edit.objects.filter(pk=done.pk).update(placeholder='data:image/jpeg;base64,kept')
+            # Без обложки: save() пошёл бы в ffmpeg, поэтому убираем её уже после создания
+            bare = Edit.objects.create(title='bare', video='edits/videos/c.mp4', thumbnail='x.jpg', author=author)
+            Edit.objects.filter(pk=bare.pk).update(thumbnail='')
+
+            out = StringIO()
+            call_command('backfill_placeholders', stdout=out, stderr=StringIO())
+
+        self.assertIn('Заглушки готовы: 1, ошибок: 0', out.getvalue())
+        pending.refresh_from_db()
+        self.assertTrue(pending.placeholder.startswith('data:image/jpeg;base64,'))
+        self.assertEqual((pending.thumb_width, pending.thumb_height), (40, 20))
+        self.assertEqual(Edit.objects.get(pk=done.pk).placeholder, 'data:image/jpeg;base64,kept')
+        bare.refresh_from_db()
+        self.assertEqual((bare.placeholder, bare.thumb_width), ('', None))
+
+
+class WarmUpTests(SimpleTestCase):
+    @mock.patch('core.boot.connections')
+    def test_warm_up_compiles_project_templates(self, connections):
+        warm_up()
+        connections.close_all.assert_called_once_with()
+        self.assertIsNotNone(get_resolver().reverse_dict)
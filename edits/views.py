@@ -4,9 +4,16 @@ from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.http import HttpResponseForbidden, JsonResponse
+from django.db import DatabaseError
 from django.db.models import Q, F, Sum, Count
+from django.core.cache import cache
+from django.conf import settings
 
-from .models import Edit, Tag
+from .models import Edit, Tag, EngagementEvent, FollowSuggestion
+from .ratelimit import ratelimit
+from .analytics import author_summary
+from .suggestions import TOP_K, refresh_after_follow
+from . import events
 from .forms import RegisterForm, EditForm, UserUpdateForm, ProfileUpdateForm
 
 # ========== ГЛАВНЫЕ СТРАНИЦЫ ==========
@@ -72,34 +79,58 @@ def profile_view(request, username=None):
         'following_count': profile_user.profile.following.count(),
         'u_form': u_form,
         'p_form': p_form,
+        # Тренды видны только владельцу профиля
+        'analytics': author_summary(profile_user.id) if request.user == profile_user else None,
     }
     return render(request, 'edits/profile.html', context)
 
 # ========== ЛОГИКА ВЗАИМОДЕЙСТВИЯ (JSON/AJAX) ==========
 
 @login_required
+@ratelimit('view')
 def increment_views(request, edit_id):
     """Увеличение просмотров при открытии модалки"""
     if request.method == 'POST':
         Edit.objects.filter(id=edit_id).update(views_count=F('views_count') + 1)
+        author_id = Edit.objects.filter(id=edit_id).values_list('author_id', flat=True).first()
+        if author_id:
+            events.record(EngagementEvent.VIEW, author_id, edit_id, request.user.id)
         return JsonResponse({'status': 'ok'})
     return JsonResponse({'status': 'error'}, status=400)
 
 @login_required
+@ratelimit('like')
 def toggle_like(request, edit_id):
-    """Лайк / дизлайк"""
+    """
+    Лайк / дизлайк.
+    Клиент может прислать желаемое состояние (liked=1/0) вместо переключения:
+    серия быстрых кликов тогда схлопывается в одну запись, а повторы — бесплатны.
+    """
     if request.method == 'POST':
         edit = get_object_or_404(Edit, id=edit_id)
-        if edit.likes.filter(id=request.user.id).exists():
-            edit.likes.remove(request.user)
-            liked = False
-        else:
-            edit.likes.add(request.user)
-            liked = True
+
+        # Последнее записанное состояние лежит в кэше, чтобы не читать M2M на каждый клик
+        state_key = f'like:{request.user.id}:{edit.id}'
+        current = cache.get(state_key)
+        if current is None:
+            current = edit.likes.filter(id=request.user.id).exists()
+
+        desired = request.POST.get('liked')
+        liked = desired == '1' if desired in ('0', '1') else not current
+
+        if liked != current:
+            if liked:
+                edit.likes.add(request.user)
+            else:
+                edit.likes.remove(request.user)
+            kind = EngagementEvent.LIKE if liked else EngagementEvent.UNLIKE
+            events.record(kind, edit.author_id, edit.id, request.user.id)
+        cache.set(state_key, liked, getattr(settings, 'LIKE_STATE_TTL', 10))
         return JsonResponse({'liked': liked, 'count': edit.likes.count()})
     return JsonResponse({'error': 'Invalid request'}, status=400)
 
 @login_required
+@ratelimit('follow')
 def toggle_follow(request, username):
     """Подписка / отписка"""
     target_user = get_object_or_404(User, username=username)
@@ -116,12 +147,43 @@ def toggle_follow(request, username):
         me.following.add(them)
         is_followed = True
 
+    kind = EngagementEvent.FOLLOW if is_followed else EngagementEvent.UNFOLLOW
+    events.record(kind, target_user.id, actor_id=request.user.id)
+    try:
+        refresh_after_follow(request.user.id, target_user.id, is_followed)
+    except DatabaseError as e:
+        # Подписка уже сохранена, подсказки досчитает compute_suggestions
+        print(f"Ошибка обновления подсказок: {e}")
+
     return JsonResponse({
         'is_followed': is_followed,
         'followers_count': them.followers.count(),
         'following_count': them.following.count(),
     })
 
+@login_required
+def follow_suggestions(request):
+    """На кого подписаться: готовый top-K из compute_suggestions"""
+    try:
+        limit = min(max(int(request.GET.get('limit', 5)), 1), TOP_K)
+    except ValueError:
+        limit = 5
+
+    following = request.user.profile.following.values('user_id')
+    rows = (
+        FollowSuggestion.objects.filter(user=request.user)
+        .exclude(suggested_id__in=following)
+        .select_related('suggested__profile')
+        .order_by('-score')[:limit]
+    )
+    return JsonResponse({'suggestions': [
+        {
+            'username': row.suggested.username,
+            'avatar': row.suggested.profile.avatar.url if row.suggested.profile.avatar else None,
+        }
+        for row in rows
+    ]})
+
 # ========== ПОИСК ==========
 
 def search_view(request):
@@ -0,0 +1,7 @@
+# Gunicorn подхватывает этот файл сам (./gunicorn.conf.py)
+import os
+
+# Грузим Django в мастере до fork: импорты и прогрев (core.boot) платятся один раз,
+# а перезапуск воркера не повторяет их. GUNICORN_PRELOAD=0 — старое поведение.
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") == "1"
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))